@@ -2,6 +2,8 @@ import argparse
 import os
 from pathlib import Path
 
+from lib.compression import open_input
+
 
 class SimpleAction(argparse.Action):
     def action(self, parser, namespace, value, option_string=None):
@@ -37,9 +39,11 @@ class EnsureDirectoryAction(SimpleAction):
 class OpenInputFileAction(SimpleAction):
     def action(self, parser, namespace, value, option_string=None):
         try:
-            value = open(value, 'r')
+            value = open_input(value)
         except FileNotFoundError:
             raise argparse.ArgumentError(self, 'file not found: ' + value)
+        except ImportError as e:
+            raise argparse.ArgumentError(self, str(e))
         return super().action(parser, namespace, value, option_string)
 
 
@@ -72,3 +76,25 @@ class StoreColumnsListAction(SimpleAction):
     def action(self, parser, namespace, value, option_string=None):
         value = list([s.strip() for s in value.lower().strip().split(',') if s])
         return super().action(parser, namespace, value, option_string)
+
+
+class StoreShardAction(SimpleAction):
+    def action(self, parser, namespace, value, option_string=None):
+        try:
+            index, count = map(int, value.split('/'))
+        except ValueError:
+            raise argparse.ArgumentError(self, 'expected INDEX/COUNT, e.g. "1/4": ' + value)
+        if not 1 <= index <= count:
+            raise argparse.ArgumentError(self, 'shard index out of range 1..{0}: {1}'.format(count, index))
+        return super().action(parser, namespace, (index, count), option_string)
+
+
+class StorePositiveIntAction(SimpleAction):
+    def action(self, parser, namespace, value, option_string=None):
+        try:
+            value = int(value)
+        except ValueError:
+            raise argparse.ArgumentError(self, 'expected a number: ' + value)
+        if value < 1:
+            raise argparse.ArgumentError(self, 'expected a positive number: {0}'.format(value))
+        return super().action(parser, namespace, value, option_string)
@@ -0,0 +1,94 @@
+import gzip
+import io
+import lzma
+import os
+
+from lib.settings import INPUT_BUFFER_SIZE
+
+GZIP, XZ, ZSTD = 'gzip', 'xz', 'zstd'
+
+COMPRESSION_MAGIC = {  # leading bytes of the compressed files
+    GZIP: b'\x1f\x8b',
+    XZ: b'\xfd7zXZ\x00',
+    ZSTD: b'\x28\xb5\x2f\xfd',
+}
+
+COMPRESSION_SUFFIXES = {
+    '.gz': GZIP,
+    '.xz': XZ,
+    '.zst': ZSTD,
+}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('The "zstandard" package is required for reading and writing .zst files.')
+    return zstandard
+
+
+def compression_by_magic(head):
+    return next((c for c, magic in COMPRESSION_MAGIC.items() if head.startswith(magic)), None)
+
+
+def compression_by_name(path):
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(str(path))[1].lower())
+
+
+class _DecompressedReader(io.BufferedReader):
+    # gzip and lzma streams don't close a file object they were given
+    def __init__(self, stream, source, buffer_size):
+        super().__init__(stream, buffer_size=buffer_size)
+        self.source = source
+
+    def seekable(self):
+        # gzip and lzma streams claim to be seekable even over a pipe
+        return self.source.seekable() and super().seekable()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.source.close()
+
+
+def open_input(path, buffer_size=INPUT_BUFFER_SIZE):
+    # text stream of a plain or compressed file, the compression is detected by content.
+    # The file is opened just once, so pipes and process substitutions work too.
+    source = open(path, 'rb', buffering=buffer_size)
+    try:
+        compression = compression_by_magic(source.peek(max(map(len, COMPRESSION_MAGIC.values()))))
+
+        if compression == GZIP:
+            stream = _DecompressedReader(gzip.GzipFile(fileobj=source, mode='rb'), source, buffer_size)
+        elif compression == XZ:
+            stream = _DecompressedReader(lzma.LZMAFile(source, mode='rb'), source, buffer_size)
+        elif compression == ZSTD:
+            reader = _zstandard().ZstdDecompressor().stream_reader(source, read_size=buffer_size)
+            stream = io.BufferedReader(reader, buffer_size=buffer_size)
+        else:
+            stream = source
+
+    except BaseException:
+        source.close()
+        raise
+
+    return io.TextIOWrapper(stream, newline='')
+
+
+def output_compressor(path):
+    # function wrapping a raw binary file into a stream compressing by suffix of the path,
+    # the stream doesn't close the raw file. Fails early if the compression is not available.
+    compression = compression_by_name(path)
+
+    if compression == GZIP:
+        name = os.path.basename(os.path.splitext(str(path))[0])
+        return lambda raw: gzip.GzipFile(filename=name, mode='wb', compresslevel=6, fileobj=raw)
+    if compression == XZ:
+        return lambda raw: lzma.LZMAFile(raw, mode='wb')
+    if compression == ZSTD:
+        zstandard = _zstandard()
+        return lambda raw: zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+
+    return lambda raw: raw
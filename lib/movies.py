@@ -1,6 +1,4 @@
 import copy
-import datetime
-import time
 from collections import defaultdict
 from datetime import date
 from urllib.parse import quote
@@ -10,6 +8,7 @@ import requests
 from pyquery import PyQuery
 
 from lib.settings import CRAWLER_USER_AGENT, CSFD_MAX_REQUESTS_PER_MINUTE
+from lib.throttle import Throttle, SharedThrottle
 from lib.utils import str_pct, tokenize_string
 
 AVAILABLE_COLUMNS = ('title', 'genre1', 'genre2', 'director', 'director2',
@@ -20,20 +19,20 @@ FIRST_MOVIE_YEAR = 1878
 MIN_YEAR = FIRST_MOVIE_YEAR
 MAX_YEAR = date.today().year
 
-csfd_throttle_stamp = None
+CSFD_REQUESTS_INTERVAL = 60 / CSFD_MAX_REQUESTS_PER_MINUTE
 
+csfd_throttle = Throttle(CSFD_REQUESTS_INTERVAL)
 
-def request_csfd_movies(query: str):
-    global csfd_throttle_stamp
 
-    search_url = '{0}?q={1}'.format("https://www.csfd.cz/hledat/", quote(query))
+def share_csfd_throttle(path):
+    global csfd_throttle
+    csfd_throttle = SharedThrottle(CSFD_REQUESTS_INTERVAL, path)
+
 
-    if csfd_throttle_stamp is not None:
-        delta = (csfd_throttle_stamp - datetime.datetime.now()).total_seconds()
-        if delta > 0:
-            time.sleep(delta)
+def request_csfd_movies(query: str):
+    search_url = '{0}?q={1}'.format("https://www.csfd.cz/hledat/", quote(query))
 
-    csfd_throttle_stamp = datetime.datetime.now() + datetime.timedelta(seconds=(CSFD_MAX_REQUESTS_PER_MINUTE / 60))
+    csfd_throttle.wait()
 
     res = requests.get(search_url, headers={'User-Agent': CRAWLER_USER_AGENT})
     content = res.content  # release connection back to pool
@@ -0,0 +1,64 @@
+import csv
+import io
+import os
+from tempfile import mkstemp
+
+from lib.compression import output_compressor
+from lib.settings import OUTPUT_BUFFER_SIZE, OUTPUT_SYNC_SIZE
+from lib.utils import backup_rename
+
+
+class AtomicCsvOutput:
+    """
+    CSV writer for a temporary file created next to the target file.
+    The target is replaced by a single rename on commit, so it never contains a partial table.
+    Targets with .gz, .xz or .zst suffix are compressed on the fly.
+    """
+
+    def __init__(self, target, buffer_size=OUTPUT_BUFFER_SIZE, sync_size=OUTPUT_SYNC_SIZE):
+        self.target = os.path.abspath(target)
+        # a checkpoint never comes before the write buffer is full, each one also flushes the compressor
+        self.sync_size = max(sync_size, buffer_size)
+        self.unsynced = 0
+
+        compress = output_compressor(self.target)  # raises ImportError before any file is created
+
+        directory, name = os.path.split(self.target)
+        fd, self.name = mkstemp(dir=directory, prefix='.{0}.'.format(name), suffix='.tmp')
+        self.raw = open(fd, 'wb', buffering=buffer_size)
+        self.file = io.TextIOWrapper(compress(self.raw), newline='')
+        self.writer = csv.writer(self.file, quoting=csv.QUOTE_MINIMAL, delimiter=",", quotechar='"')
+
+    def writerow(self, row):
+        self.unsynced += self.writer.writerow(row)  # number of characters written
+        if self.unsynced >= self.sync_size:
+            self.sync()
+
+    def sync(self):
+        self.unsynced = 0
+        self.file.flush()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()  # writes the end of the compressed stream
+
+        if not self.raw.closed:  # compressed streams don't close the temporary file
+            self.raw.flush()
+            os.fsync(self.raw.fileno())
+            self.raw.close()
+
+    def commit(self, backup=False):
+        self.close()
+        if backup and os.path.isfile(self.target):
+            backup_rename(self.target)
+        os.replace(self.name, self.target)
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        self.raw.close()
+        if os.path.isfile(self.name):
+            os.remove(self.name)
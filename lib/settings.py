@@ -21,3 +21,15 @@ CSFD_MAX_REQUESTS_PER_MINUTE = 60
 FLAT_GROUPBY_COLUMNS = ('title', 'filename',)  # these group-by directories doesn't group into subdirectories by value
 
 DEFAULT_GROUPBY_COLUMNS = ('title', 'genre', 'country', 'director', 'actor',)
+
+OUTPUT_BUFFER_SIZE = 1024 * 1024  # bytes buffered before the output csv is written to the disk
+
+OUTPUT_SYNC_SIZE = 16 * OUTPUT_BUFFER_SIZE  # flush and fsync the output csv after this many characters written
+
+SORT_BUFFER_ROWS = 100000  # rows sorted in memory before they are spilled to a temporary file
+
+SELECTION_RULES = ('perfect', 'jaro', 'newest', 'oldest', 'first')  # rules for picking the best candidate row
+
+DEFAULT_SELECTION_RULES = ('perfect', 'jaro',)
+
+INPUT_BUFFER_SIZE = 1024 * 1024  # bytes read at once from the (decompressed) input csv
@@ -0,0 +1,41 @@
+import csv
+import heapq
+import os
+from tempfile import TemporaryDirectory
+
+from lib.settings import SORT_BUFFER_ROWS
+
+
+def _spill_run(rows, directory, number):
+    path = os.path.join(directory, 'run{0}.csv'.format(number))
+    with open(path, 'w', newline='') as f:
+        csv.writer(f, quoting=csv.QUOTE_MINIMAL, delimiter=",", quotechar='"').writerows(rows)
+    return path
+
+
+def external_sort(rows, key, buffer_rows=SORT_BUFFER_ROWS, directory=None):
+    """
+    Yields csv rows sorted by the key, keeping at most `buffer_rows` rows in memory.
+    The key gets the rows read back from the temporary files, so it has to work with string values.
+    """
+    with TemporaryDirectory(dir=directory, prefix='.sort.') as tmp:
+        runs, chunk = [], []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= buffer_rows:
+                runs.append(_spill_run(sorted(chunk, key=key), tmp, len(runs)))
+                chunk = []
+
+        if not runs:  # everything fits into the memory
+            yield from sorted(chunk, key=key)
+            return
+
+        if chunk:
+            runs.append(_spill_run(sorted(chunk, key=key), tmp, len(runs)))
+
+        files = [open(path, 'r', newline='') for path in runs]
+        try:
+            yield from heapq.merge(*[csv.reader(f, delimiter=",", quotechar='"') for f in files], key=key)
+        finally:
+            for f in files:
+                f.close()
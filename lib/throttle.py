@@ -0,0 +1,50 @@
+import sqlite3
+import time
+
+
+class Throttle:
+    """
+    Keeps a minimal interval (in seconds) between the requests of the current process.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stamp = None
+
+    def reserve(self):
+        # reserves the next free time slot, returns number of seconds to wait for it
+        now = time.time()
+        start = max(now, self.stamp or now)
+        self.stamp = start + self.interval
+        return start - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SharedThrottle(Throttle):
+    """
+    Keeps a minimal interval between the requests of all processes sharing the same state file on the local machine.
+    """
+
+    def __init__(self, interval, path):
+        super().__init__(interval)
+        self.connection = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS throttle (id INTEGER PRIMARY KEY, stamp REAL NOT NULL)')
+
+    def reserve(self):
+        db = self.connection
+        db.execute('BEGIN IMMEDIATE')  # locks the database for writing until the new stamp is stored
+        try:
+            row = db.execute('SELECT stamp FROM throttle WHERE id = 1').fetchone()
+            now = time.time()
+            start = max(now, row[0] if row else now)
+            db.execute('INSERT OR REPLACE INTO throttle (id, stamp) VALUES (1, ?)', (start + self.interval,))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+        return start - now
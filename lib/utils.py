@@ -2,6 +2,7 @@ import os
 import re
 import shutil
 import sys
+import zlib
 from pathlib import Path
 
 from unidecode import unidecode
@@ -51,16 +52,28 @@ def tokenize_string(source: str, stop_words=None) -> list:
     return list(filter(lambda x: x not in stop_words, list_of_words) if stop_words is not None else list_of_words)
 
 
-def backup_rename(original_file_name, count=0):
+def backup_rename(original_file_name):
     def fname(i):
         return "{fn}.bak{suff}".format(fn=original_file_name, suff='.{0}'.format(i) if i else '')
 
-    backup = Path(fname(count))
-    if backup.is_file():
-        backup_rename(original_file_name, count + 1)
+    # a single directory listing instead of a stat per backup level
+    directory, base_name = os.path.split(os.path.abspath(original_file_name))
+    existing = set(os.listdir(directory))
 
-    target = Path(fname(count - 1)) if count > 0 else Path(original_file_name)
-    target.rename(backup)
+    count = 0
+    while os.path.basename(fname(count)) in existing:
+        count += 1
+
+    # shift the chain from the oldest backup: .bak.1 -> .bak.2, .bak -> .bak.1, ...
+    for i in range(count, 0, -1):
+        os.rename(fname(i - 1), fname(i))
+    os.rename(original_file_name, fname(0))
+
+
+def shard_index(row, count):
+    # deterministic across processes and runs, unlike hash()
+    filename = row[0] if row else ''
+    return zlib.crc32(filename.encode('utf-8')) % count
 
 
 def str_pct(num):
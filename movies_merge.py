@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import os.path
+import sys
+
+from collections import defaultdict
+
+from lib.action import OpenInputFileAction, ProtectFileOverwriteAction
+from lib.compression import open_input
+from lib.output import AtomicCsvOutput
+from lib.utils import print_dict_as_table, shard_index
+
+
+class Program:
+    """
+    -i input csv file of the sharded run (or std input)
+    -f overwrite output
+    output csv file
+    shard output csv files, ordered by the shard index
+    """
+
+    def __init__(self):
+        parser = self.get_parser()
+        self.args = parser.parse_args()
+        self.stats = defaultdict(int)
+
+        # every shard run writes at least the header row, a missing file is a failed or forgotten shard
+        self.shards = []
+        for path in self.args.shards:
+            if not os.path.exists(path):
+                parser.error('Shard file not found: ' + path)
+            try:
+                self.shards.append(open_input(path))
+            except ImportError as e:
+                parser.error(str(e))
+
+        self.readers = [csv.reader(f, delimiter=",", quotechar='"') for f in self.shards]
+        headers = [next(reader, None) for reader in self.readers]
+        with_header = [(path, h) for path, h in zip(self.args.shards, headers) if h is not None]
+        self.header = with_header[0][1] if with_header else None
+        different = [path for path, h in with_header if h != self.header]
+        if different:
+            parser.error('Header row of {0} differs from {1}'.format(', '.join(different), with_header[0][0]))
+
+        # the last step, nothing may fail before the temporary file is handled by finish()
+        try:
+            self.output = AtomicCsvOutput(self.args.output)
+        except ImportError as e:
+            parser.error(str(e))
+
+    @staticmethod
+    def get_parser():
+        parser = argparse.ArgumentParser(description="Merges outputs of sharded movies_metadata.py runs "
+                                                     "in the order of the original input.")
+
+        # INPUT CSV FILE
+        parser.add_argument("-i",
+                            action=OpenInputFileAction, dest="input", metavar="FILENAME", default=sys.stdin,
+                            help="The input csv file name of the sharded run. Reads standard input if not set.")
+
+        # OVERWRITE OUTPUT
+        # PROHIBIT BACKUP (2nd usage)
+        parser.add_argument("-f",
+                            action="count", dest="overwrite", default=0,
+                            help="Overwrites existing output file, if used twice, overwrites without a backup.")
+
+        # OUTPUT FILE
+        parser.add_argument('output',
+                            action=ProtectFileOverwriteAction, metavar='OUTPUT_FILE',
+                            help="Name of the output CSV file.")
+
+        # SHARD FILES
+        parser.add_argument('shards',
+                            nargs='+', metavar='SHARD_FILE',
+                            help="Output CSV files of all the shards, the first one for shard 1/COUNT etc.")
+
+        return parser
+
+    def finish(self):
+        for f in [self.args.input, *self.shards]:
+            if f != sys.stdin:
+                f.close()
+
+        if self.stats['write']:
+            self.output.commit(backup=self.args.overwrite == 1)
+        else:
+            self.output.discard()
+
+        print_dict_as_table(self.stats)
+
+    def main(self):
+        count = len(self.shards)
+        readers = self.readers
+
+        if self.header is None:
+            return
+        self.output.writerow(self.header)
+
+        # the next unmerged row of each shard, every shard keeps the order of the input
+        pending = [next(reader, None) for reader in readers]
+
+        for src_row in csv.reader(self.args.input, delimiter=",", quotechar='"'):
+            self.stats['read'] += 1
+            filename = src_row[0] if src_row else ''
+            shard = shard_index(src_row, count)
+
+            merged = 0
+            while pending[shard] is not None and pending[shard][:1] == [filename]:
+                self.output.writerow(pending[shard])
+                pending[shard] = next(readers[shard], None)
+                merged += 1
+
+            self.stats['write'] += merged
+            if not merged:
+                self.stats['no_result'] += 1
+
+        # rows not matching the input, e.g. shards of another input or different COUNT
+        for shard, reader in enumerate(readers):
+            while pending[shard] is not None:
+                print('Unmatched row of shard {0}/{1}: {2}'.format(shard + 1, count, pending[shard]))
+                self.output.writerow(pending[shard])
+                pending[shard] = next(reader, None)
+                self.stats['write'] += 1
+                self.stats['unmatched'] += 1
+
+
+if __name__ == "__main__":
+    program = Program()
+
+    try:
+        program.main()
+
+    except KeyboardInterrupt:
+        print()  # end the line if the input was interrupted by Ctrl+C
+
+    except Exception:
+        program.output.discard()  # don't leave the temporary file next to the output file
+        raise
+
+    program.finish()
@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
 import argparse
 import csv
-import os.path
-import shutil
 import sys
 
 from collections import defaultdict
-from tempfile import NamedTemporaryFile
 from requests.exceptions import ConnectionError as RequestsConnectionError
 
-from lib.action import OpenInputFileAction, StoreColumnsListAction, LoadFileLinesAction, ProtectFileOverwriteAction
-from lib.movies import search_movies, AVAILABLE_COLUMNS, movie_query_match
+from lib.action import OpenInputFileAction, StoreColumnsListAction, LoadFileLinesAction, ProtectFileOverwriteAction, \
+    StoreShardAction
+from lib.movies import search_movies, AVAILABLE_COLUMNS, movie_query_match, share_csfd_throttle
+from lib.output import AtomicCsvOutput
 from lib.settings import DEFAULT_COLUMNS, DEFAULT_SKIPPING_COLUMNS, FLAT_GROUPBY_COLUMNS
-from lib.utils import log, tokenize_string, backup_rename, print_dict_as_table
+from lib.utils import log, tokenize_string, print_dict_as_table, shard_index
 
 
 class Program:
@@ -22,6 +21,8 @@ class Program:
     -s file with stopwords to be removed from base file name
     -f overwrite output
     -x filled columns
+    --shard process only one part of the input rows
+    --throttle file with request rate limit state shared by processes
     output csv file
     """
 
@@ -29,11 +30,18 @@ class Program:
         parser = self.get_parser()
         self.args = parser.parse_args()
         self.stats = defaultdict(int)
-        self.temp_output = NamedTemporaryFile(mode="w", delete=False)
+        if self.args.throttle:
+            share_csfd_throttle(self.args.throttle)
         self.stopwords = set(self.args.stopwords or [])
         with open('assets/stopwords.txt', 'r') as f:
             self.stopwords.update(set([x.strip() for x in f.read().strip().splitlines() if x]))
 
+        # the last step, nothing may fail before the temporary file is handled by finish()
+        try:
+            self.output = AtomicCsvOutput(self.args.output)
+        except ImportError as e:
+            parser.error(str(e))
+
     @staticmethod
     def get_parser():
         parser = argparse.ArgumentParser(description="Scans movie files in a directory and returns matches from ČSFD.")
@@ -72,6 +80,19 @@ class Program:
                                  "OPTIONS: {0}. ".format(', '.join(sorted(AVAILABLE_COLUMNS))) +
                                  'DEFAULT: "{0}".'.format(','.join(DEFAULT_SKIPPING_COLUMNS)))
 
+        # SHARDED RUN
+        parser.add_argument("--shard",
+                            action=StoreShardAction, dest="shard", metavar="INDEX/COUNT",
+                            help="Process only the input rows of the INDEX-th of COUNT shards, e.g. \"2/4\". "
+                                 "Rows are partitioned by a hash of the file name. "
+                                 "Use movies_merge.py to combine the shard outputs.")
+
+        # SHARED RATE LIMIT
+        parser.add_argument("--throttle",
+                            dest="throttle", metavar="FILE",
+                            help="State file of the ČSFD request rate limit shared by all processes using it, "
+                                 "e.g. concurrently running shards.")
+
         # OUTPUT FILE
         parser.add_argument('output',
                             action=ProtectFileOverwriteAction, metavar='OUTPUT_FILE',
@@ -80,39 +101,47 @@ class Program:
         return parser
 
     def finish(self):
-        if hasattr(self, 'temp_output'):
-            self.temp_output.close()
-
         if self.args.input and self.args.input != sys.stdin:
             self.args.input.close()
 
-        if self.stats['write']:
-            if os.path.isfile(self.args.output):
-                if self.args.overwrite == 1:  # single usage -f
-                    backup_rename(self.args.output)
-                elif self.args.overwrite == 2:  # double usage -ff
-                    os.remove(self.args.output)
+        # a shard output is needed by movies_merge.py, even if it's just the header row
+        if self.stats['write'] or self.args.shard:
+            # single usage -f keeps a backup, double usage -ff just replaces the existing file
+            self.output.commit(backup=self.args.overwrite == 1)
+        else:
+            self.output.discard()
 
-            shutil.move(self.temp_output.name, self.args.output)
         print('\n\n')
         print_dict_as_table(self.stats)
 
+    def in_shard(self, row):
+        if not self.args.shard:
+            return True
+        index, count = self.args.shard
+        return shard_index(row, count) == index - 1
+
     def main(self):
         total = None
         if self.args.input == sys.stdin:
             log("Reading the standard input...")
 
-        else:
-            total = len([line for line in self.args.input])
+        elif self.args.input.seekable():  # compressed zstd input can't be rewound for counting
+            if self.args.shard:
+                total = len([row for row in csv.reader(self.args.input) if self.in_shard(row)])
+            else:
+                total = len([line for line in self.args.input])
             self.args.input.seek(0)
             log("Total number of requested records: {0}".format(total))  # init console output
 
         reader = csv.reader(self.args.input, delimiter=",", quotechar='"')
-        writer = csv.writer(self.temp_output, quoting=csv.QUOTE_MINIMAL, delimiter=",", quotechar='"')
 
-        writer.writerow(self.args.columns)  # header row
+        self.output.writerow(self.args.columns)  # header row
 
         for src_row in reader:
+            if not self.in_shard(src_row):
+                self.stats['other_shard'] += 1
+                continue
+
             kwlog = dict(total=total, counter=self.stats['read'])
             log('- processing input: {}'.format(src_row), **kwlog)
             self.stats['read'] += 1
@@ -198,7 +227,7 @@ class Program:
                             value = row[col][0]
                     dest_row += value if type(value) == list else [value]
 
-                writer.writerow(dest_row)
+                self.output.writerow(dest_row)
                 self.stats['write'] += 1
             kwlog['counter'] += + 1
             log(**kwlog)
@@ -213,4 +242,8 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print()  # end the line if the input was interrupted by Ctrl+C
 
+    except Exception:
+        program.output.discard()  # don't leave the temporary file next to the output file
+        raise
+
     program.finish()
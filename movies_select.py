@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import itertools
+import os.path
+import sys
+
+from collections import defaultdict
+
+from lib.action import OpenInputFileAction, StoreColumnsListAction, ProtectFileOverwriteAction, \
+    StorePositiveIntAction
+from lib.compression import compression_by_name
+from lib.output import AtomicCsvOutput
+from lib.settings import SELECTION_RULES, DEFAULT_SELECTION_RULES, SORT_BUFFER_ROWS
+from lib.sort import external_sort
+from lib.utils import print_dict_as_table
+
+SEQ_COLUMN_ID = 0  # original row number, prepended to each row while sorting
+FILENAME_COLUMN_ID = 1
+
+
+class Program:
+    """
+    -i input csv file (or std input)
+    -t comma-separated list of selection rules
+    -r output csv file with ambiguous rows
+    -b number of rows sorted in memory
+    -f overwrite output
+    output csv file
+    """
+
+    def __init__(self):
+        parser = self.get_parser()
+        self.args = parser.parse_args()
+        self.stats = defaultdict(int)
+
+        unknown_rules = [r for r in self.args.rules if r not in SELECTION_RULES]
+        if unknown_rules:
+            parser.error('unknown selection rules: {0}'.format(', '.join(unknown_rules)))
+
+        if self.args.review is None:
+            name, compressed_ext = self.args.output, ''
+            if compression_by_name(name):
+                name, compressed_ext = os.path.splitext(name)
+            name, ext = os.path.splitext(name)
+            self.args.review = '{0}.review{1}{2}'.format(name, ext or '.csv', compressed_ext)
+
+        # checked after parsing, "-f" may follow "-r" on the command line
+        if os.path.isfile(self.args.review) and not self.args.overwrite:
+            parser.error('Review file already exists. Use "-f" to overwrite.')
+
+        # the last step, nothing may fail before the temporary files are handled by finish()
+        try:
+            self.output = AtomicCsvOutput(self.args.output)
+            try:
+                self.review = AtomicCsvOutput(self.args.review)
+            except BaseException:
+                self.output.discard()
+                raise
+        except ImportError as e:
+            parser.error(str(e))
+
+    @staticmethod
+    def get_parser():
+        parser = argparse.ArgumentParser(description="Keeps the best candidate row for each file "
+                                                     "of the movies_metadata.py output.")
+
+        # INPUT CSV FILE
+        parser.add_argument("-i",
+                            action=OpenInputFileAction, dest="input", metavar="FILENAME", default=sys.stdin,
+                            help="The input csv file name, the first row is a header. "
+                                 "Reads standard input if not set.")
+
+        # SELECTION RULES
+        parser.add_argument("-t",
+                            action=StoreColumnsListAction, dest="rules", metavar="RULES",
+                            default=DEFAULT_SELECTION_RULES,
+                            help="comma-separated list of rules comparing the candidates, the next rule breaks "
+                                 "a tie of the previous ones. OPTIONS: {0}. ".format(', '.join(SELECTION_RULES)) +
+                                 'DEFAULT: "{0}".'.format(','.join(DEFAULT_SELECTION_RULES)))
+
+        # OVERWRITE OUTPUT
+        # PROHIBIT BACKUP (2nd usage)
+        parser.add_argument("-f",
+                            action="count", dest="overwrite", default=0,
+                            help="Overwrites existing output files, if used twice, overwrites without a backup.")
+
+        # REVIEW FILE
+        parser.add_argument("-r",
+                            dest="review", metavar="FILENAME",
+                            help="Name of the CSV file for candidates which could not be resolved by the rules. "
+                                 'DEFAULT: OUTPUT_FILE with ".review" suffix.')
+
+        # SORT BUFFER
+        parser.add_argument("-b",
+                            action=StorePositiveIntAction, dest="buffer_rows", metavar="ROWS",
+                            default=SORT_BUFFER_ROWS,
+                            help="Number of rows sorted in memory. DEFAULT: {0}.".format(SORT_BUFFER_ROWS))
+
+        # OUTPUT FILE
+        parser.add_argument('output',
+                            action=ProtectFileOverwriteAction, metavar='OUTPUT_FILE',
+                            help="Name of the output CSV file.")
+
+        return parser
+
+    def finish(self):
+        if self.args.input and self.args.input != sys.stdin:
+            self.args.input.close()
+
+        for output, key in ((self.output, 'selected'), (self.review, 'review_rows')):
+            if self.stats[key]:
+                output.commit(backup=self.args.overwrite == 1)
+            else:
+                output.discard()
+
+        print_dict_as_table(self.stats)
+
+    def get_rules(self, header):
+        match_ids = [i + 1 for i, col in enumerate(header) if col == 'match']
+        year_ids = [i + 1 for i, col in enumerate(header) if col == 'year']
+
+        def cell(row, i):
+            # rows edited by hand may be shorter than the header
+            return row[i] if i < len(row) else ''
+
+        def year(row):
+            years = [int(cell(row, i)) for i in year_ids if cell(row, i).isdigit()]
+            return years[0] if years else None
+
+        def perfect(row):
+            return int(any(cell(row, i) == '100' for i in match_ids))
+
+        def jaro(row):
+            # jaro-winkler percents are always below 100, "100" is the flag of the perfect match
+            scores = [cell(row, i) for i in match_ids]
+            return max([int(s) for s in scores if s.isdigit() and s != '100'] or [-1])
+
+        def newest(row):
+            y = year(row)
+            return y if y is not None else -1
+
+        def oldest(row):
+            y = year(row)
+            return -y if y is not None else -sys.maxsize
+
+        def first(row):
+            return -int(row[SEQ_COLUMN_ID])
+
+        rules = dict(perfect=perfect, jaro=jaro, newest=newest, oldest=oldest, first=first)
+        return [rules[r] for r in self.args.rules]
+
+    def main(self):
+        reader = csv.reader(self.args.input, delimiter=",", quotechar='"')
+        header = next(reader, None)
+        if header is None:
+            return
+
+        self.output.writerow(header)
+        self.review.writerow(header)
+        rules = self.get_rules(header)
+
+        def rank(row):
+            return [rule(row) for rule in rules]
+
+        def rows():
+            for seq, row in enumerate(reader):
+                if row:
+                    self.stats['read'] += 1
+                    yield [seq] + row
+
+        sorted_rows = external_sort(rows(), key=lambda r: (r[FILENAME_COLUMN_ID], int(r[SEQ_COLUMN_ID])),
+                                    buffer_rows=self.args.buffer_rows,
+                                    directory=os.path.dirname(self.output.target))
+
+        def selected_rows():
+            for _, group in itertools.groupby(sorted_rows, key=lambda r: r[FILENAME_COLUMN_ID]):
+                candidates = list(group)
+                self.stats['files'] += 1
+
+                ranked = sorted(candidates, key=rank, reverse=True)
+                if len(ranked) == 1 or rank(ranked[0]) != rank(ranked[1]):
+                    yield ranked[0]
+                    self.stats['selected'] += 1
+                    if len(ranked) > 1:
+                        self.stats['resolved'] += 1
+                else:
+                    for row in candidates:  # keep the original order of the candidates
+                        self.review.writerow(row[1:])
+                        self.stats['review_rows'] += 1
+                    self.stats['ambiguous'] += 1
+
+        # sort the selected rows back to the order of the input
+        for row in external_sort(selected_rows(), key=lambda r: int(r[SEQ_COLUMN_ID]),
+                                 buffer_rows=self.args.buffer_rows,
+                                 directory=os.path.dirname(self.output.target)):
+            self.output.writerow(row[1:])
+
+
+if __name__ == "__main__":
+    program = Program()
+
+    try:
+        program.main()
+
+    except KeyboardInterrupt:
+        print()  # end the line if the input was interrupted by Ctrl+C
+
+    except Exception:
+        program.output.discard()  # don't leave the temporary files next to the output files
+        program.review.discard()
+        raise
+
+    program.finish()